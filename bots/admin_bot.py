@@ -1,6 +1,6 @@
 from aiogram import Bot, Dispatcher
 from config.settings import settings
-from bots.handlers import city, donor, pending, publish
+from bots.handlers import city, donor, pending, publish, profile
 
 bot = Bot(token=settings.ADMIN_BOT_TOKEN, parse_mode="HTML")
 dp = Dispatcher()
@@ -8,3 +8,4 @@ dp.include_router(city.router)
 dp.include_router(donor.router)
 dp.include_router(pending.router)
 dp.include_router(publish.router)
+dp.include_router(profile.router)
@@ -3,9 +3,9 @@ from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from core.models import DonorChannel, City
+from core.masks import MaskError, mask_engine, normalize_text, validate_mask
 from infra.db import AsyncSessionLocal
 from sqlalchemy.future import select
-import re
 
 router = Router()
 
@@ -21,37 +21,6 @@ admin_main_kb = types.ReplyKeyboardMarkup(
     resize_keyboard=True
 )
 
-# ================================
-# Вспомогательные функции
-
-def normalize_text(text: str) -> str:
-    """Нормализация перевода строк и невидимых символов."""
-    if not text:
-        return ""
-    text = text.replace('\r\n', '\n').replace('\r', '\n')
-    text = re.sub(r"[\u200b\u200c\u200d\uFEFF]", "", text)
-    return text.strip()
-
-def remove_signature_from_end(post_text: str, signature: str) -> str:
-    """
-    Удаляет подпись (маску) с конца поста, даже если между ними 1-2 таба или пустые строки.
-    """
-    norm_text = normalize_text(post_text)
-    norm_sign = normalize_text(signature)
-    if not norm_sign:
-        return norm_text
-    # Разрешаем в конце до 3 любых whitespace перед маской (включая табы и \n)
-    # и до 3 любых whitespace после маски до конца строки
-    # Маска в re.escape, чтобы не было багов на спецсимволах
-    pattern = rf"((\s|\t|\n){{0,3}}{re.escape(norm_sign)}(\s|\t|\n){{0,3}})$"
-    cleaned = re.sub(pattern, "", norm_text, flags=re.DOTALL)
-    return cleaned.strip()
-
-def clean_mask(mask: str) -> str:
-    # Убираем невидимые символы и неразрывные пробелы
-    mask = re.sub(r"[\u200b\u200c\u200d\uFEFF]", "", mask or "")
-    return mask.strip()
-
 # ================================
 # Состояния FSM
 
@@ -116,8 +85,12 @@ async def donor_mask_received(message: types.Message, state: FSMContext):
     data = await state.get_data()
     city_id = data["city_id"]
     link = data["donor_link"]
-    mask_raw = message.text.strip()
-    mask = clean_mask(mask_raw)
+    try:
+        mask = validate_mask(message.text)
+    except MaskError as e:
+        await message.answer(f"Ошибка! {e}. Добавьте донора заново.", reply_markup=admin_main_kb)
+        await state.clear()
+        return
     channel_id = link.split("/")[-1]
 
     async with AsyncSessionLocal() as session:
@@ -210,11 +183,17 @@ async def prompt_new_mask(callback: types.CallbackQuery, state: FSMContext):
 async def update_mask(message: types.Message, state: FSMContext):
     data = await state.get_data()
     donor_id = data["donor_id"]
-    new_mask_raw = message.text.strip()
-    new_mask = clean_mask(new_mask_raw)
+    try:
+        new_mask = validate_mask(message.text)
+    except MaskError as e:
+        await message.answer(f"Ошибка! {e}. Маска не изменена.", reply_markup=admin_main_kb)
+        await state.clear()
+        return
     async with AsyncSessionLocal() as session:
         donor = await session.get(DonorChannel, donor_id)
         donor.mask_pattern = new_mask
+        # Новая версия — кэш масок перекомпилирует её на следующем сообщении
+        donor.mask_version = (donor.mask_version or 0) + 1
         await session.commit()
     await message.answer(
         f"Маска донора обновлена:\n<pre>{repr(new_mask)}</pre>\nHEX: <code>{new_mask.encode().hex()}</code>",
@@ -274,7 +253,7 @@ async def find_and_publish(callback: types.CallbackQuery, state: FSMContext):
         donor = await session.get(DonorChannel, donor_id)
         city = await session.get(City, city_id)
 
-    mask_pattern = donor.mask_pattern
+    mask = mask_engine.get(donor)
     donor_channel_id = donor.channel_id
 
     from telethon import TelegramClient
@@ -287,7 +266,7 @@ async def find_and_publish(callback: types.CallbackQuery, state: FSMContext):
         for msg in messages:
             if not msg.text:
                 continue
-            cleaned_text = remove_signature_from_end(msg.text, mask_pattern)
+            cleaned_text = mask.strip(msg.text)
             if cleaned_text != normalize_text(msg.text):
                 found = (msg, cleaned_text)
                 break
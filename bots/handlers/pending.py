@@ -15,7 +15,7 @@ async def show_channels(message: types.Message):
 async def pending_posts_handler(message: types.Message):
     async with AsyncSessionLocal() as session:
         result = await session.execute(
-            select(Post).where(Post.status == "pending").limit(10)
+            select(Post).where(Post.status == "pending", Post.is_duplicate == False).limit(10)
         )
         posts = result.scalars().all()
         if not posts:
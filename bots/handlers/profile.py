@@ -0,0 +1,41 @@
+from aiogram import Router, types
+from aiogram.filters import Command
+from core.models import Admin
+from infra.db import AsyncSessionLocal
+from tools import profiler
+import datetime
+import html
+
+router = Router()
+
+DEFAULT_SECONDS = 30
+MAX_SECONDS = 300
+
+@router.message(Command("profile"))
+async def profile_handler(message: types.Message):
+    async with AsyncSessionLocal() as session:
+        admin = await session.get(Admin, message.from_user.id)
+    if not admin or not admin.is_super:
+        await message.answer("Команда доступна только супер-админам.")
+        return
+
+    args = message.text.split()
+    if len(args) > 1 and not args[1].isdigit():
+        await message.answer("Использование: /profile <code>[секунд]</code>")
+        return
+    seconds = int(args[1]) if len(args) > 1 else DEFAULT_SECONDS
+    seconds = max(1, min(seconds, MAX_SECONDS))
+
+    report = await profiler.try_profile_for(
+        seconds, on_start=lambda: message.answer(f"Профилирую event loop {seconds} с...")
+    )
+    if report is None:
+        await message.answer("Профилирование уже идёт, дождитесь результата.")
+        return
+
+    stamp = datetime.datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    await message.answer_document(
+        types.BufferedInputFile(report.collapsed(), filename=f"profile-{stamp}.collapsed"),
+        caption="Collapsed stacks: flamegraph.pl или speedscope.app",
+    )
+    await message.answer(f"<pre>{html.escape(report.summary())}</pre>", parse_mode="HTML")
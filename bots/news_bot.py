@@ -1,6 +1,13 @@
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from config.settings import settings
 
-bot = Bot(token=settings.NEWS_BOT_TOKEN, parse_mode="HTML")
+# TELEGRAM_API_SERVER позволяет направить бота на локальный мок Bot API (нагрузочный тест)
+session = None
+if settings.TELEGRAM_API_SERVER:
+    session = AiohttpSession(api=TelegramAPIServer.from_base(settings.TELEGRAM_API_SERVER))
+
+bot = Bot(token=settings.NEWS_BOT_TOKEN, parse_mode="HTML", session=session)
 dp = Dispatcher()
 # Не подключаем routers!
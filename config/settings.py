@@ -11,6 +11,9 @@ class Settings(BaseSettings):
     SIMILARITY_THRESHOLD: float = 0.82
     MEDIA_ROOT: str = "/var/lib/setinews_media"
     DONOR_CACHE_TTL_MIN: int = 10
+    IMAGE_HASH_THRESHOLD: int = 10  # макс. расстояние Хэмминга для повтора картинки
+    IMAGE_DEDUP_WINDOW_HOURS: int = 48
+    TELEGRAM_API_SERVER: str = ""  # пусто — api.telegram.org
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,130 @@
+"""
+Перцептивные хэши картинок и индекс для поиска повторов между донорами.
+
+Один и тот же снимок доноры выкладывают с разными подписями и пережатым,
+поэтому текстовый dedup его не ловит. pHash (DCT 32x32 -> 8x8 низких частот)
+переживает пережатие, ресайз и мелкие правки; расстояние между хэшами — Хэмминга.
+"""
+import time
+
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 64
+
+# Таблица popcount для байта: Хэмминг считается по 8 байтам хэша разом для всего индекса
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Ортонормированная матрица DCT-II: X = D @ x @ D.T."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    m[0] /= np.sqrt(2)
+    return m
+
+
+_DCT32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8)).tobytes(), "big")
+
+
+def phash(pixels: np.ndarray) -> int:
+    """pHash по серому изображению 32x32."""
+    coeffs = _DCT32 @ pixels.astype(np.float64) @ _DCT32.T
+    low = coeffs[:8, :8].ravel()
+    # DC-коэффициент (яркость) в медиану не берём
+    return _bits_to_int(low > np.median(low[1:]))
+
+
+def dhash(pixels: np.ndarray) -> int:
+    """dHash по серому изображению 8x9 (строки x столбцы)."""
+    pixels = pixels.astype(np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def image_fingerprint(source) -> int:
+    """
+    pHash картинки (путь или файловый объект, например BytesIO).
+    Декодирование тяжёлое — из event loop вызывать через asyncio.to_thread.
+    """
+    with Image.open(source) as img:
+        gray = img.convert("L").resize((32, 32), Image.LANCZOS)
+        return phash(np.asarray(gray))
+
+
+def hamming(hashes: np.ndarray, value: int) -> np.ndarray:
+    """Расстояния Хэмминга от value до каждого хэша в массиве uint64."""
+    x = np.bitwise_xor(hashes, np.uint64(value))
+    return _POPCOUNT[x.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def to_signed(value: int) -> int:
+    """uint64 -> int64 для BigInteger в Postgres."""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def from_signed(value: int) -> int:
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+class ImageHashIndex:
+    """
+    Хэши картинок по городам за последние window секунд.
+    Поиск — векторный XOR + popcount по всему окну города.
+    """
+
+    def __init__(self, window: float, threshold: int):
+        self.window = window
+        self.threshold = threshold
+        self._hashes = {}
+        self._times = {}
+
+    def is_loaded(self, city_id: int) -> bool:
+        return city_id in self._hashes
+
+    def load(self, city_id: int, rows):
+        """Прогрев из БД: rows — пары (hash, timestamp). Повторный прогрев игнорируется."""
+        if self.is_loaded(city_id):
+            return
+        rows = list(rows)
+        self._hashes[city_id] = np.array([h for h, _ in rows], dtype=np.uint64)
+        self._times[city_id] = np.array([ts for _, ts in rows], dtype=np.float64)
+
+    def _prune(self, city_id: int, now: float):
+        times = self._times[city_id]
+        keep = times >= now - self.window
+        if not keep.all():
+            self._hashes[city_id] = self._hashes[city_id][keep]
+            self._times[city_id] = times[keep]
+
+    def find(self, city_id: int, value: int, now: float = None):
+        """Минимальное расстояние до хэша в окне, если оно не больше threshold, иначе None."""
+        if not self.is_loaded(city_id):
+            return None
+        now = time.time() if now is None else now
+        self._prune(city_id, now)
+        hashes = self._hashes[city_id]
+        if not hashes.size:
+            return None
+        best = int(hamming(hashes, value).min())
+        return best if best <= self.threshold else None
+
+    def add(self, city_id: int, value: int, now: float = None):
+        now = time.time() if now is None else now
+        self.load(city_id, [])
+        self._hashes[city_id] = np.append(self._hashes[city_id], np.uint64(value))
+        self._times[city_id] = np.append(self._times[city_id], now)
+
+    def check_and_add(self, city_id: int, value: int, now: float = None):
+        """
+        find + add без await между ними: два одинаковых фото, пришедших одновременно,
+        не проскочат оба. Повтор в индекс не добавляется.
+        """
+        match = self.find(city_id, value, now)
+        if match is None:
+            self.add(city_id, value, now)
+        return match
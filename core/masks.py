@@ -0,0 +1,169 @@
+"""
+Маски доноров: подпись, которую срезаем с конца поста.
+
+Маска компилируется один раз и кэшируется по (донор, версия маски); версия растёт
+при каждом сохранении. Подпись ищется сравнением с хвостом текста, старые regex-маски
+(processor.apply_mask) исполняются в RE2 без backtracking'а.
+
+Отдельного бюджета времени на сообщение нет — его заменяет гарантия линейного времени:
+маска не длиннее MAX_MASK_LENGTH, сообщение Telegram — не длиннее 4096 символов,
+так что время матчинга ограничено заранее, что бы админ ни ввёл.
+"""
+import functools
+import re
+
+import re2
+
+MAX_MASK_LENGTH = 1024
+
+_INVISIBLE = re.compile(r"[\u200b\u200c\u200d\uFEFF]")
+
+_RE2_OPTIONS = re2.Options()
+_RE2_OPTIONS.log_errors = False
+
+# В RE2 \w, \d, \s — только ASCII, а маски у нас кириллические; переписываем
+# в юникодные классы с тем же смыслом, что у re в Python 3
+_UNICODE_CLASSES = {
+    "w": r"\p{L}\p{N}_",
+    "d": r"\p{Nd}",
+    "s": r"\t\n\v\f\r\x{1c}-\x{1f}\x{85}\p{Z}",
+}
+
+
+class MaskError(ValueError):
+    pass
+
+
+def normalize_text(text: str) -> str:
+    """Нормализация перевода строк и невидимых символов."""
+    if not text:
+        return ""
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = _INVISIBLE.sub("", text)
+    return text.strip()
+
+
+def clean_mask(mask: str) -> str:
+    # Убираем невидимые символы и неразрывные пробелы
+    mask = _INVISIBLE.sub("", mask or "")
+    return mask.strip()
+
+
+def validate_mask(mask: str) -> str:
+    """Чистит маску перед сохранением; MaskError, если сохранять нечего или она слишком длинная."""
+    mask = clean_mask(mask)
+    if not normalize_text(mask):
+        raise MaskError("Маска пустая")
+    if len(mask) > MAX_MASK_LENGTH:
+        raise MaskError(f"Маска длиннее {MAX_MASK_LENGTH} символов")
+    return mask
+
+
+def _to_re2(pattern: str) -> str:
+    r"""
+    Приводит regex из синтаксиса re к RE2 без смены смысла на кириллице:
+    \w/\d/\s -> юникодные классы, \Z -> \z. \b/\B в RE2 только ASCII — отклоняем.
+    """
+    out = []
+    in_class = False
+    class_start = 0
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\" and i + 1 < len(pattern):
+            esc = pattern[i + 1]
+            low = esc.lower()
+            if esc in "bB":
+                raise MaskError(
+                    f"\\{esc} в RE2 понимает только латиницу — используйте \\p{{L}} / \\p{{N}} или пробелы явно"
+                )
+            if low in _UNICODE_CLASSES:
+                body = _UNICODE_CLASSES[low]
+                if esc == low:
+                    out.append(body if in_class else f"[{body}]")
+                elif in_class:
+                    raise MaskError(f"\\{esc} внутри [...] не поддерживается — используйте [^...] с \\p{{L}} / \\p{{N}}")
+                else:
+                    out.append(f"[^{body}]")
+            elif esc == "Z":
+                out.append(r"\z")
+            else:
+                out.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if in_class:
+            # "]" сразу после "[" или "[^" — литерал, а не конец класса
+            if ch == "]" and i > class_start:
+                in_class = False
+        elif ch == "[":
+            in_class = True
+            class_start = i + 1
+            if pattern[class_start:class_start + 1] == "^":
+                class_start += 1
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_pattern(pattern: str):
+    """Regex-маска в RE2 (линейное время). Обратные ссылки и lookaround RE2 не поддерживает."""
+    if len(pattern) > MAX_MASK_LENGTH:
+        raise MaskError(f"Маска длиннее {MAX_MASK_LENGTH} символов")
+    try:
+        return re2.compile(_to_re2(pattern), _RE2_OPTIONS)
+    except re2.error as e:
+        reason = e.args[0].decode() if e.args and isinstance(e.args[0], bytes) else str(e)
+        raise MaskError(f"Некорректное регулярное выражение: {reason}") from None
+
+
+class SignatureMask:
+    __slots__ = ("signature",)
+
+    def __init__(self, signature: str):
+        self.signature = normalize_text(signature)
+
+    def strip(self, text: str) -> str:
+        """
+        Удаляет подпись с конца поста, даже если между ними табы или пустые строки.
+        Текст после normalize_text уже без хвостовых пробелов, так что достаточно endswith.
+        """
+        text = normalize_text(text)
+        if self.signature and text.endswith(self.signature):
+            return text[:-len(self.signature)].strip()
+        return text
+
+
+def remove_signature_from_end(post_text: str, signature: str) -> str:
+    return SignatureMask(signature).strip(post_text)
+
+
+def match_pattern(pattern: str, text: str):
+    """Вырезает regex-маску из текста: (текст, число замен). Время линейно по длине текста."""
+    compiled = compile_pattern(pattern)
+    # В re "$" совпадает и перед завершающим "\n", в RE2 — только в самом конце
+    if text.endswith("\n"):
+        text = text[:-1]
+    return compiled.subn("", text)
+
+
+class MaskEngine:
+    """Кэш скомпилированных масок доноров по (донор, версия маски)."""
+
+    def __init__(self):
+        self._cache = {}
+
+    def get(self, donor) -> SignatureMask:
+        version = donor.mask_version or 0
+        cached = self._cache.get(donor.id)
+        if cached and cached[0] == version:
+            return cached[1]
+        mask = SignatureMask(donor.mask_pattern or "")
+        self._cache[donor.id] = (version, mask)
+        return mask
+
+    def strip(self, donor, text: str) -> str:
+        return self.get(donor).strip(text)
+
+
+mask_engine = MaskEngine()
@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, Integer, String, Boolean, ForeignKey, DateTime, Text
+    Column, Integer, BigInteger, String, Boolean, ForeignKey, DateTime, Text, Index
 )
 from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, relationship
@@ -25,6 +25,7 @@ class DonorChannel(Base):
     channel_id = Column(String, unique=True, nullable=False)
     city_id = Column(Integer, ForeignKey("city.id"), nullable=False)
     mask_pattern = Column(String, nullable=True)
+    mask_version = Column(Integer, default=1)  # растёт при каждом сохранении маски (ключ кэша масок)
 
     city = relationship("City", back_populates="donors")
     posts = relationship("Post", back_populates="donor")
@@ -37,6 +38,7 @@ class Post(Base):
     original_text = Column(Text, nullable=False)
     processed_text = Column(Text, nullable=True)
     media_path = Column(String, nullable=True)
+    image_hash = Column(BigInteger, nullable=True)  # pHash (uint64 как int64)
     source_link = Column(String, nullable=True)
     is_ad = Column(Boolean, default=False)
     is_duplicate = Column(Boolean, default=False)
@@ -47,6 +49,9 @@ class Post(Base):
     donor = relationship("DonorChannel", back_populates="posts")
     city = relationship("City", back_populates="posts")
 
+    # Прогрев индекса картинок: посты города за окно IMAGE_DEDUP_WINDOW_HOURS
+    __table_args__ = (Index("ix_post_city_id_created_at", "city_id", "created_at"),)
+
 class Admin(Base):
     __tablename__ = "admin"
     tg_id = Column(Integer, primary_key=True)
@@ -1,7 +1,6 @@
-import re
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from bots.handlers.donor import remove_signature_from_end
+from core.masks import match_pattern, mask_engine
 
 AD_PHRASES = [
     "реклама", "подписывайся", "подпишись", "акция", "скидка", "магазин"
@@ -10,12 +9,13 @@ AD_PHRASES = [
 def apply_mask(text: str, mask_pattern: str):
     """
     Если маска задана, режем подписи и прочее (Устарело!).
+    Regex компилируется один раз и исполняется в RE2 (MaskError на невалидный).
     """
     if not mask_pattern:
         return text
-    match = re.search(mask_pattern, text)
-    if match:
-        return re.sub(mask_pattern, "", text).strip()
+    cleaned, count = match_pattern(mask_pattern, text)
+    if count:
+        return cleaned.strip()
     else:
         return None  # если не совпало, пост не подходит
 
@@ -44,13 +44,13 @@ def add_signature(text: str, city_title: str):
 def process_post(text: str, donor, city_title: str = "") -> str:
     """
     Главная функция для обработки текста перед публикацией:
-    - чистим подпись (маску) по новому алгоритму (remove_signature_from_end)
+    - чистим подпись (маску): скомпилированная маска донора из кэша
     - можно добавить другие фильтры (ads, dedup, paraphrase)
     - добавляем подпись города (опционально)
     """
     if donor.mask_pattern:
         # Удаляем маску/подпись с конца текста!
-        text = remove_signature_from_end(text, donor.mask_pattern)
+        text = mask_engine.strip(donor, text)
     # Можно добавить рекламу/dedup/paraphrase
     # text = paraphrase(text) ...
     if city_title:
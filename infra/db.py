@@ -1,3 +1,4 @@
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from config.settings import settings
@@ -18,8 +19,18 @@ async def get_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
 
+# create_all не добавляет колонки и индексы в уже существующие таблицы —
+# для старых баз докатываем их здесь (идемпотентно, Postgres)
+UPGRADES = [
+    "ALTER TABLE post ADD COLUMN IF NOT EXISTS image_hash BIGINT",
+    "CREATE INDEX IF NOT EXISTS ix_post_city_id_created_at ON post (city_id, created_at)",
+    "ALTER TABLE donor_channel ADD COLUMN IF NOT EXISTS mask_version INTEGER DEFAULT 1",
+]
+
 # Функция для инициализации БД (создание таблиц)
 async def init_db():
     from core.models import Base
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        for statement in UPGRADES:
+            await conn.execute(text(statement))
@@ -0,0 +1,40 @@
+from telethon.tl import types
+from core.imagehash import image_fingerprint
+import asyncio
+import io
+
+# pHash всё равно сжимает картинку до 32x32 — хватает самого маленького превью не меньше этого
+THUMB_MIN_SIDE = 64
+
+def own_photo(event):
+    """
+    Фото, приложенное к самому сообщению. event.photo в Telethon отдаёт и картинку из
+    превью ссылки (og:image сайта) — у разных статей одного сайта она часто общая,
+    и такие посты ложно считались бы повторами.
+    """
+    media = getattr(event, "media", None)
+    if isinstance(media, types.MessageMediaPhoto) and isinstance(media.photo, types.Photo):
+        return media.photo
+    return None
+
+def pick_thumb(photo):
+    """
+    Наименьший PhotoSize со сторонами от THUMB_MIN_SIDE. PhotoSizeProgressive не подходит:
+    Telethon принимает в thumb только PhotoSize/PhotoCachedSize/PhotoStrippedSize/VideoSize.
+    Если подходящего нет — None, то есть фото целиком.
+    """
+    sizes = [
+        size for size in photo.sizes
+        if isinstance(size, types.PhotoSize) and size.w >= THUMB_MIN_SIDE and size.h >= THUMB_MIN_SIDE
+    ]
+    return min(sizes, key=lambda size: size.w * size.h) if sizes else None
+
+async def fingerprint_photo(event):
+    """pHash собственного фото сообщения: превью качается в память (не на диск), хэш — вне event loop."""
+    photo = own_photo(event)
+    if photo is None:
+        return None
+    data = await event.download_media(file=bytes, thumb=pick_thumb(photo))
+    if not data:
+        return None
+    return await asyncio.to_thread(image_fingerprint, io.BytesIO(data))
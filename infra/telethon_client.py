@@ -1,15 +1,117 @@
 from telethon import TelegramClient, events
 from config.settings import settings
 from infra.db import AsyncSessionLocal
-from core.models import DonorChannel, City
+from core.models import DonorChannel, City, Post
 from core.processor import process_post
+from core.imagehash import ImageHashIndex, to_signed, from_signed
+from infra.media import fingerprint_photo
 from bots.news_bot import bot as news_bot
 from loguru import logger
 import asyncio
+import datetime
 from sqlalchemy import select
 
-async def start_telethon_watcher():
-    client = TelegramClient('parser', settings.TG_API_ID, settings.TG_API_HASH)
+image_index = ImageHashIndex(
+    window=settings.IMAGE_DEDUP_WINDOW_HOURS * 3600,
+    threshold=settings.IMAGE_HASH_THRESHOLD,
+)
+
+async def warm_image_index(session, city_id: int):
+    """Подтягивает хэши картинок города за окно из БД (после рестарта индекс пустой)."""
+    if image_index.is_loaded(city_id):
+        return
+    since = datetime.datetime.utcnow() - datetime.timedelta(hours=settings.IMAGE_DEDUP_WINDOW_HOURS)
+    result = await session.execute(
+        select(Post.image_hash, Post.created_at).where(
+            Post.city_id == city_id,
+            Post.image_hash.isnot(None),
+            Post.is_duplicate == False,
+            Post.created_at >= since,
+        )
+    )
+    image_index.load(city_id, [
+        (from_signed(h), created_at.replace(tzinfo=datetime.timezone.utc).timestamp())
+        for h, created_at in result.all()
+    ])
+
+async def handle_new_message(event):
+    """
+    Обработка нового сообщения из донорского канала.
+    Вынесено из start_telethon_watcher, чтобы тот же путь можно было гонять нагрузочным тестом.
+    """
+    donor_id = event.chat.username or event.chat.id or str(event.chat)
+    text = event.text or ""
+
+    # Картинка: тот же снимок от другого донора с другой подписью — повтор.
+    # Считаем до открытия сессии, чтобы соединение из пула не простаивало в транзакции на время загрузки
+    image_hash = None
+    try:
+        image_hash = await fingerprint_photo(event)
+    except Exception as e:
+        logger.error(f"Error fingerprinting photo: {e}")
+
+    async with AsyncSessionLocal() as session:
+        # ПРАВИЛЬНО: ищем донора ORM-запросом!
+        result = await session.execute(
+            select(DonorChannel).where(
+                (DonorChannel.channel_id == donor_id) | (DonorChannel.channel_id == str(event.chat.id))
+            )
+        )
+        donor = result.scalar_one_or_none()
+        if not donor:
+            logger.warning(f"Unknown donor: {donor_id}")
+            return
+
+        # ПРАВИЛЬНО: ищем город ORM-запросом!
+        result = await session.execute(
+            select(City).where(City.id == donor.city_id)
+        )
+        city = result.scalar_one_or_none()
+        if not city:
+            logger.warning(f"Unknown city for donor: {donor_id}")
+            return
+
+        # Обработка текста (чистка подписи и т.п.)
+        clean_text = process_post(text, donor, city_title=city.title)
+
+        is_duplicate = False
+        if image_hash is not None:
+            await warm_image_index(session, city.id)
+            distance = image_index.check_and_add(city.id, image_hash)
+            if distance is not None:
+                is_duplicate = True
+                logger.info(f"Duplicate image from {donor.channel_id} for {city.channel_id} (distance {distance})")
+
+        post = Post(
+            donor_id=donor.id,
+            city_id=city.id,
+            original_text=text,
+            processed_text=clean_text,
+            image_hash=to_signed(image_hash) if image_hash is not None else None,
+            is_duplicate=is_duplicate,
+        )
+        session.add(post)
+        await session.commit()
+
+        if city.auto_mode and not is_duplicate:
+            logger.info(f"Publishing post from {donor.channel_id} to {city.channel_id}")
+            try:
+                await news_bot.send_message(chat_id=city.channel_id, text=clean_text)
+                post.status = "published"
+                post.published_at = datetime.datetime.utcnow()
+            except Exception as e:
+                # Не "pending": автопубликация не удалась, в очередь модерации пост не попадает
+                post.status = "failed"
+                logger.error(f"Error sending message: {e}")
+            await session.commit()
+
+async def start_telethon_watcher(client=None):
+    """
+    client можно передать снаружи (например, FakeTelethonClient из tools/loadtest),
+    иначе создаётся настоящий TelegramClient.
+    """
+    if client is None:
+        client = TelegramClient('parser', settings.TG_API_ID, settings.TG_API_HASH)
     await client.start()
     logger.info("Telethon client started.")
 
@@ -19,38 +121,6 @@ async def start_telethon_watcher():
         donors = result.scalars().all()
     donor_ids = [donor.channel_id for donor in donors]
 
-    @client.on(events.NewMessage(chats=donor_ids))
-    async def handler(event):
-        donor_id = event.chat.username or event.chat.id or str(event.chat)
-        text = event.text or ""
-        async with AsyncSessionLocal() as session:
-            # ПРАВИЛЬНО: ищем донора ORM-запросом!
-            result = await session.execute(
-                select(DonorChannel).where(
-                    (DonorChannel.channel_id == donor_id) | (DonorChannel.channel_id == str(event.chat.id))
-                )
-            )
-            donor = result.scalar_one_or_none()
-            if not donor:
-                logger.warning(f"Unknown donor: {donor_id}")
-                return
-
-            # ПРАВИЛЬНО: ищем город ORM-запросом!
-            result = await session.execute(
-                select(City).where(City.id == donor.city_id)
-            )
-            city = result.scalar_one_or_none()
-            if not city:
-                logger.warning(f"Unknown city for donor: {donor_id}")
-                return
-
-            # Обработка текста (чистка подписи и т.п.)
-            clean_text = process_post(text, donor, city_title=city.title)
-            if city.auto_mode:
-                logger.info(f"Publishing post from {donor.channel_id} to {city.channel_id}")
-                try:
-                    await news_bot.send_message(chat_id=city.channel_id, text=clean_text)
-                except Exception as e:
-                    logger.error(f"Error sending message: {e}")
+    client.add_event_handler(handle_new_message, events.NewMessage(chats=donor_ids))
 
     await client.run_until_disconnected()
@@ -0,0 +1,53 @@
+import io
+import numpy as np
+from PIL import Image
+from core import imagehash
+
+def make_image(seed, size=256):
+    # Шум со спектром 1/f — статистика как у реальных фото
+    rnd = np.random.default_rng(seed)
+    f = np.fft.fftfreq(size)
+    r = np.hypot(*np.meshgrid(f, f))
+    r[0, 0] = 1
+    img = np.real(np.fft.ifft2(np.fft.fft2(rnd.normal(size=(size, size))) / r))
+    return ((img - img.min()) / np.ptp(img) * 255).astype(np.uint8)
+
+def distance(a, b):
+    return int(imagehash.hamming(np.array([a], dtype=np.uint64), b)[0])
+
+def test_fingerprint_survives_recompression(tmp_path):
+    original = tmp_path / "original.png"
+    repost = tmp_path / "repost.jpg"
+    other = tmp_path / "other.png"
+    Image.fromarray(make_image(1)).convert("RGB").save(original)
+    Image.fromarray(make_image(1)).convert("RGB").resize((180, 180)).save(repost, quality=40)
+    Image.fromarray(make_image(2)).convert("RGB").save(other)
+
+    base = imagehash.image_fingerprint(str(original))
+    assert distance(base, imagehash.image_fingerprint(str(repost))) <= 4
+    assert distance(base, imagehash.image_fingerprint(str(other))) > 10
+
+def test_dhash():
+    img = np.tile(np.arange(9), (8, 1))
+    assert imagehash.dhash(img) == (1 << 64) - 1
+    assert imagehash.dhash(img[:, ::-1]) == 0
+
+def test_signed_roundtrip():
+    for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        signed = imagehash.to_signed(value)
+        assert -(1 << 63) <= signed < 1 << 63
+        assert imagehash.from_signed(signed) == value
+
+def test_index_threshold_and_window():
+    index = imagehash.ImageHashIndex(window=3600, threshold=4)
+    base = 0b1111
+    assert index.check_and_add(1, base, now=0) is None
+    assert index.check_and_add(1, base ^ 0b111, now=10) == 3
+    assert index.find(2, base, now=10) is None  # другой город
+    assert index.find(1, base ^ 0b11111, now=10) is None  # дальше порога
+    assert index.find(1, base, now=4000) is None  # вышло из окна
+
+def test_fingerprint_from_bytes(tmp_path):
+    path = tmp_path / "thumb.jpg"
+    Image.fromarray(make_image(5)).convert("RGB").resize((90, 90)).save(path)
+    assert imagehash.image_fingerprint(io.BytesIO(path.read_bytes())) == imagehash.image_fingerprint(str(path))
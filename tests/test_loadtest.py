@@ -0,0 +1,77 @@
+import asyncio
+import time
+from tools.loadtest import events
+from tools.loadtest.runner import percentile
+
+def test_schedules_keep_rate():
+    assert len(list(events.constant_schedule(10, 2))) == 20
+    burst = list(events.burst_schedule(10, 2, burst_size=5))
+    assert len(burst) == 20 and burst[:5] == [0.0] * 5
+    poisson = list(events.poisson_schedule(100, 10, seed=1))
+    assert 800 < len(poisson) < 1200
+
+def test_marker_survives_signature():
+    text = events.make_text(42, signature="Подпись")
+    assert events.parse_seq(text) == 42
+    assert events.parse_seq("без маркера") is None
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+
+def test_fake_client_filters_chats():
+    seen = []
+
+    async def handler(event):
+        seen.append(event.seq)
+
+    async def run():
+        client = events.FakeTelethonClient()
+        client.add_event_handler(handler, type("NewMessage", (), {"chats": ["donor"]})())
+        make_event = lambda seq: (events.FakeChat("donor" if seq % 2 else "other", seq), "")
+        await client.play([0, 0, 0, 0], make_event)
+        await client.drain(1)
+
+    asyncio.run(run())
+    assert seen == [1, 3]
+
+def test_latency_includes_backlog():
+    latencies = []
+
+    async def slow_handler(event):
+        await asyncio.sleep(0.02)
+        latencies.append(time.perf_counter() - event.emitted_at)
+
+    async def run():
+        client = events.FakeTelethonClient(sequential_updates=True)
+        client.add_event_handler(slow_handler)
+        make_event = lambda seq: (events.FakeChat("donor", seq), "")
+        # 100 сообщ./с при 50 сообщ./с пропускной способности — очередь растёт
+        await client.play(events.constant_schedule(100, 0.3), make_event)
+
+    asyncio.run(run())
+    assert len(latencies) == 30
+    assert percentile(latencies, 99) > 0.2
+    assert latencies[-1] > 5 * latencies[0]
+
+def test_mock_bot_api_runs_on_its_own_loop():
+    from aiohttp import ClientSession
+    from tools.loadtest.bot_api import MockBotAPI
+
+    mock = MockBotAPI(port=18081, latency_ms=0, jitter_ms=0)
+    mock.start_in_thread()
+    try:
+        async def send():
+            async with ClientSession() as http:
+                url = f"{mock.base_url}/bot123:abc/sendMessage"
+                async with http.post(url, data={"chat_id": "city", "text": events.make_text(7)}) as resp:
+                    return resp.status, await resp.json()
+
+        status, payload = asyncio.run(send())
+    finally:
+        mock.stop_thread()
+
+    assert status == 200 and payload["ok"]
+    assert [record.seq for record in mock.records] == [7]
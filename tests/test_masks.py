@@ -0,0 +1,71 @@
+import re
+import time
+from types import SimpleNamespace
+import pytest
+from core import masks
+
+def old_remove_signature_from_end(post_text, signature):
+    # Прежняя regex-реализация — эталон для сравнения
+    norm_text = masks.normalize_text(post_text)
+    norm_sign = masks.normalize_text(signature)
+    if not norm_sign:
+        return norm_text
+    pattern = rf"((\s|\t|\n){{0,3}}{re.escape(norm_sign)}(\s|\t|\n){{0,3}})$"
+    return re.sub(pattern, "", norm_text, flags=re.DOTALL).strip()
+
+@pytest.mark.parametrize("text, signature", [
+    ("Новость\n\nПодпишись на канал", "Подпишись на канал"),
+    ("Новость\t\t\nПодпишись\u200b на канал  ", "Подпишись на канал"),
+    ("Новость\r\n\r\n(a+)+$", "(a+)+$"),
+    ("Подпись в середине. Новость", "Подпись"),
+    ("Только подпись", "Только подпись"),
+    ("Новость", ""),
+])
+def test_signature_matches_old_behaviour(text, signature):
+    assert masks.remove_signature_from_end(text, signature) == old_remove_signature_from_end(text, signature)
+
+def test_validate_mask():
+    assert masks.validate_mask("  \u200bПодпись\ufeff ") == "Подпись"
+    with pytest.raises(masks.MaskError):
+        masks.validate_mask("\u200b  ")
+    with pytest.raises(masks.MaskError):
+        masks.validate_mask("x" * (masks.MAX_MASK_LENGTH + 1))
+
+def test_engine_caches_by_version():
+    engine = masks.MaskEngine()
+    donor = SimpleNamespace(id=1, mask_pattern="Подпись", mask_version=1)
+    first = engine.get(donor)
+    assert engine.get(donor) is first
+    donor.mask_pattern, donor.mask_version = "Новая", 2
+    assert engine.get(donor) is not first
+    assert engine.strip(donor, "Текст\nНовая") == "Текст"
+
+def test_regex_mask_is_linear():
+    started = time.perf_counter()
+    assert masks.compile_pattern(r"(a+)+$").search("a" * 50000 + "b") is None
+    assert time.perf_counter() - started < 0.5
+    with pytest.raises(masks.MaskError):
+        masks.compile_pattern(r"(a)\1")
+    with pytest.raises(masks.MaskError):
+        masks.compile_pattern("a" * (masks.MAX_MASK_LENGTH + 1))
+    assert masks.match_pattern(r"\s*Подпись$", "Текст Подпись") == ("Текст", 1)
+
+@pytest.mark.parametrize("pattern, text", [
+    (r"\w+$", "Новость Подпись"),
+    (r"\s*Подпись\d*$", "Новость\u00a0Подпись٣"),
+    (r"[\w\s]+$", "Новость! Подпись канала"),
+    (r"\W+Подпись$", "Новость —— Подпись"),
+    (r"[^\w]+$", "Новость!!!"),
+    (r"❤️.*$", "Новость ❤️Подпись\n"),
+    (r"Подпись\Z", "Новость Подпись"),
+])
+def test_regex_mask_matches_like_re_on_cyrillic(pattern, text):
+    expected = re.sub(pattern, "", text).strip()
+    cleaned, count = masks.match_pattern(pattern, text)
+    assert count > 0
+    assert cleaned.strip() == expected
+
+def test_regex_mask_rejects_ascii_only_constructs():
+    for pattern in (r"\bПодпись", r"Под\Bпись", r"[\W]+"):
+        with pytest.raises(masks.MaskError, match=r"\\p\{L\}"):
+            masks.compile_pattern(pattern)
@@ -0,0 +1,33 @@
+import asyncio
+from telethon.tl import types
+from infra import media
+
+def make_photo(*sizes):
+    return types.Photo(id=1, access_hash=1, file_reference=b"", date=None, sizes=list(sizes), dc_id=2)
+
+def make_message(message_media):
+    return types.Message(id=1, peer_id=types.PeerChannel(1), date=None, message="Новость", media=message_media)
+
+def test_web_preview_photo_is_not_fingerprinted():
+    webpage = types.WebPage(id=1, url="https://site.ru/a", display_url="site.ru/a", hash=0, photo=make_photo())
+    message = make_message(types.MessageMediaWebPage(webpage=webpage))
+    assert message.photo is not None  # Telethon отдаёт og:image как photo
+    assert media.own_photo(message) is None
+
+    async def download_media(**kwargs):
+        raise AssertionError("превью ссылки не должно скачиваться")
+
+    message.download_media = download_media
+    assert asyncio.run(media.fingerprint_photo(message)) is None
+
+def test_own_photo():
+    photo = make_photo()
+    assert media.own_photo(make_message(types.MessageMediaPhoto(photo=photo))) is photo
+
+def test_pick_thumb_skips_progressive_and_tiny():
+    small = types.PhotoSize(type="s", w=90, h=90, size=1000)
+    medium = types.PhotoSize(type="m", w=320, h=320, size=10000)
+    tiny = types.PhotoSize(type="i", w=40, h=40, size=300)
+    progressive = types.PhotoSizeProgressive(type="y", w=80, h=80, sizes=[100, 500])
+    assert media.pick_thumb(make_photo(tiny, progressive, medium, small)) is small
+    assert media.pick_thumb(make_photo(tiny, progressive)) is None
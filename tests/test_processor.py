@@ -5,6 +5,7 @@ def test_apply_mask():
     text = "Новость ❤️Подпись"
     mask = r"❤️.*$"
     assert processor.apply_mask(text, mask) == "Новость"
+    assert processor.apply_mask("Новость Подпись", r"\w+$") == "Новость"
 
 def test_contains_ad():
     assert processor.contains_ad("Реклама и скидка") is True
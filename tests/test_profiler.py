@@ -0,0 +1,37 @@
+import asyncio
+import time
+from tools import profiler
+
+def blocking_work(seconds):
+    time.sleep(seconds)
+
+def test_profiler_catches_slow_callback():
+    async def scenario():
+        async def worker():
+            await asyncio.sleep(0.1)
+            blocking_work(0.3)
+
+        task = asyncio.create_task(worker())
+        report = await profiler.profile_for(0.6, slow_threshold=0.1)
+        await task
+        return report
+
+    report = asyncio.run(scenario())
+    assert report.samples > 0
+    assert len(report.stall_durations) == 1
+    assert 0.2 < report.stall_durations[0] < 0.5
+    assert any("blocking_work" in stack for stack in report.stall_stacks)
+    assert any("worker" in name for name in report.task_counts)
+    assert b"blocking_work" in report.collapsed()
+    assert not profiler.is_running()
+
+def test_second_profile_is_rejected_not_queued():
+    async def scenario():
+        first = asyncio.create_task(profiler.try_profile_for(0.2))
+        await asyncio.sleep(0.05)
+        second = await profiler.try_profile_for(0.2)
+        return await first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is not None
+    assert second is None
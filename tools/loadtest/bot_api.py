@@ -0,0 +1,176 @@
+"""
+Локальный мок Telegram Bot API для нагрузочного теста.
+
+Отвечает на /bot<token>/<method> как настоящий сервер, записывает отправки,
+добавляет задержку и с заданной вероятностью отвечает 429 (flood wait).
+news_bot направляется сюда через settings.TELEGRAM_API_SERVER.
+
+start_in_thread запускает сервер на собственном event loop в отдельном потоке:
+разбор HTTP, JSON и задержки мока не конкурируют за loop с тестируемым обработчиком.
+"""
+import asyncio
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+from aiohttp import web
+
+from tools.loadtest.events import parse_seq
+
+
+@dataclass
+class SendRecord:
+    method: str
+    chat_id: str
+    text: str
+    seq: Optional[int]
+    received_at: float
+    done_at: float
+    status: int
+
+
+class MockBotAPI:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8081,
+        latency_ms: float = 50.0,
+        jitter_ms: float = 20.0,
+        flood_rate: float = 0.0,
+        retry_after: int = 1,
+        seed: Optional[int] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        # Пополняется из потока мока; list.append атомарен, читатель берёт срез
+        self.records = []
+        self._rnd = random.Random(seed)
+        self._message_id = 0
+        self._runner = None
+        self._loop = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # ================================
+    # Ответы в формате Bot API
+
+    @staticmethod
+    def _chat_id(raw: str) -> int:
+        # В проекте chat_id бывает строкой (username канала) — отдаём стабильный отрицательный id
+        try:
+            return int(raw)
+        except (TypeError, ValueError):
+            return -1000000000000 - zlib.crc32((raw or "").encode())
+
+    def _message(self, chat_id: str, text: str) -> dict:
+        self._message_id += 1
+        return {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": self._chat_id(chat_id), "type": "channel", "title": str(chat_id)},
+            "text": text,
+        }
+
+    def _delay(self) -> float:
+        ms = self.latency_ms + self._rnd.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(ms, 0.0) / 1000
+
+    async def handle(self, request: web.Request) -> web.Response:
+        received_at = time.perf_counter()
+        method = request.match_info["method"]
+        data = await request.post()
+        chat_id = str(data.get("chat_id", ""))
+        text = str(data.get("text") or data.get("caption") or "")
+
+        await asyncio.sleep(self._delay())
+
+        if method == "getMe":
+            return web.json_response({"ok": True, "result": {
+                "id": 1, "is_bot": True, "first_name": "mock", "username": "mock_bot",
+            }})
+
+        if method.startswith("send") and self.flood_rate and self._rnd.random() < self.flood_rate:
+            status = 429
+            payload = {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }
+        elif method.startswith("send"):
+            status = 200
+            payload = {"ok": True, "result": self._message(chat_id, text)}
+        else:
+            status = 200
+            payload = {"ok": True, "result": True}
+
+        if method.startswith("send"):
+            record = SendRecord(
+                method=method,
+                chat_id=chat_id,
+                text=text,
+                seq=parse_seq(text),
+                received_at=received_at,
+                done_at=time.perf_counter(),
+                status=status,
+            )
+            self.records.append(record)
+        return web.json_response(payload, status=status)
+
+    # ================================
+    # Запуск / остановка
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self):
+        """Поднимает сервер на своём loop'е в фоновом потоке; возвращается, когда порт слушается."""
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.start())
+            except Exception as e:
+                errors.append(e)
+                ready.set()
+                self._loop.close()
+                return
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="mock-bot-api", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+
+    def stop_thread(self):
+        if self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,195 @@
+"""
+Фейковый источник событий Telethon для нагрузочного теста.
+
+FakeTelethonClient повторяет ту часть интерфейса TelegramClient, которой пользуется
+start_telethon_watcher (start / add_event_handler / run_until_disconnected),
+и раздаёт FakeNewMessage по расписанию с заданной скоростью и формой всплесков.
+"""
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+MARKER = "loadtest#"
+
+
+@dataclass
+class FakeChat:
+    username: Optional[str]
+    id: int
+
+
+@dataclass
+class FakeNewMessage:
+    """Минимум полей events.NewMessage.Event, которые читает handle_new_message."""
+    chat: FakeChat
+    text: str
+    seq: int = 0
+    media: object = None
+    emitted_at: float = field(default_factory=time.perf_counter)
+
+
+def make_text(seq: int, body: str = "Тестовая новость", signature: str = "") -> str:
+    # Маркер в начале текста нужен, чтобы мок Bot API сопоставил отправку с исходным событием;
+    # в конце он бы мешал срезать подпись донора
+    text = f"{MARKER}{seq} {body}"
+    if signature:
+        text = f"{text}\n\n{signature}"
+    return text
+
+
+def parse_seq(text: str) -> Optional[int]:
+    pos = (text or "").find(MARKER)
+    if pos < 0:
+        return None
+    digits = ""
+    for ch in text[pos + len(MARKER):]:
+        if not ch.isdigit():
+            break
+        digits += ch
+    return int(digits) if digits else None
+
+
+# ================================
+# Расписания: генераторы смещений (в секундах от старта)
+
+def constant_schedule(rate: float, duration: float) -> Iterator[float]:
+    """Равномерно: rate событий в секунду."""
+    if rate <= 0:
+        return
+    step = 1.0 / rate
+    t = 0.0
+    while t < duration:
+        yield t
+        t += step
+
+
+def poisson_schedule(rate: float, duration: float, seed: Optional[int] = None) -> Iterator[float]:
+    """Пуассоновский поток со средней скоростью rate."""
+    if rate <= 0:
+        return
+    rnd = random.Random(seed)
+    t = rnd.expovariate(rate)
+    while t < duration:
+        yield t
+        t += rnd.expovariate(rate)
+
+
+def burst_schedule(rate: float, duration: float, burst_size: int = 20) -> Iterator[float]:
+    """Пачки по burst_size событий одновременно; средняя скорость та же — rate."""
+    if rate <= 0 or burst_size <= 0:
+        return
+    period = burst_size / rate
+    t = 0.0
+    while t < duration:
+        for _ in range(burst_size):
+            yield t
+        t += period
+
+
+SCHEDULES = {
+    "constant": constant_schedule,
+    "poisson": poisson_schedule,
+    "burst": burst_schedule,
+}
+
+
+def load_replay(path: str) -> list:
+    """
+    Запись для повтора — JSONL, одна строка на сообщение:
+    {"offset": 0.25, "chat": "donor_username", "text": "..."}
+    """
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            items.append((float(row["offset"]), row["chat"], row.get("text", "")))
+    items.sort(key=lambda item: item[0])
+    return items
+
+
+# ================================
+# Клиент
+
+class FakeTelethonClient:
+    def __init__(self, sequential_updates: bool = False):
+        # Как и в Telethon: по умолчанию каждое обновление обрабатывается в своей задаче
+        self.sequential_updates = sequential_updates
+        self.handlers = []
+        self.ready = asyncio.Event()
+        self.inflight = set()
+        self.errors = 0
+        self._disconnected = asyncio.Event()
+        self._seq = 0
+
+    async def start(self):
+        return self
+
+    def add_event_handler(self, callback, event=None):
+        chats = set(getattr(event, "chats", None) or [])
+        self.handlers.append((callback, chats))
+        self.ready.set()
+
+    def on(self, event):
+        def decorator(callback):
+            self.add_event_handler(callback, event)
+            return callback
+        return decorator
+
+    async def run_until_disconnected(self):
+        await self._disconnected.wait()
+
+    def disconnect(self):
+        self._disconnected.set()
+
+    def next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    async def _run_handlers(self, event: FakeNewMessage):
+        for callback, chats in self.handlers:
+            # В фейке chats — строки channel_id из БД, как их передаёт start_telethon_watcher
+            if chats and event.chat.username not in chats and str(event.chat.id) not in chats:
+                continue
+            try:
+                await callback(event)
+            except Exception:
+                self.errors += 1
+
+    async def dispatch(self, event: FakeNewMessage):
+        if self.sequential_updates:
+            await self._run_handlers(event)
+            return
+        task = asyncio.create_task(self._run_handlers(event))
+        self.inflight.add(task)
+        task.add_done_callback(self.inflight.discard)
+
+    async def play(self, offsets, make_event, on_emit=None):
+        """
+        Проигрывает расписание: offsets — возрастающие смещения в секундах,
+        make_event(seq) -> (chat, text). Если цикл не успевает, события уходят сразу.
+        emitted_at — время по расписанию, а не фактической отправки: иначе отставание
+        (очередь перед обработчиком) не попадает в задержку (coordinated omission).
+        """
+        start = time.perf_counter()
+        for offset in offsets:
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            seq = self.next_seq()
+            chat, text = make_event(seq)
+            event = FakeNewMessage(chat=chat, text=text, seq=seq, emitted_at=start + offset)
+            if on_emit:
+                on_emit(event)
+            await self.dispatch(event)
+
+    async def drain(self, timeout: float) -> int:
+        """Ждёт завершения обработчиков; возвращает число незавершённых."""
+        if self.inflight:
+            await asyncio.wait(set(self.inflight), timeout=timeout)
+        return len(self.inflight)
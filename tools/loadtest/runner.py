@@ -0,0 +1,255 @@
+"""
+Нагрузочный тест полного пути: фейковый Telethon -> handle_new_message -> Postgres -> мок Bot API.
+
+Пример:
+    python -m tools.loadtest.runner --rates 5,10,20,50,100 --duration 10 --shape poisson
+    python -m tools.loadtest.runner --replay recorded.jsonl --flood-rate 0.05
+
+Нужен локальный Postgres в POSTGRES_DSN (.env). Раннер создаёт город и доноров
+с префиксом loadtest_ и удаляет их после прогона (если не указан --keep-data).
+
+Мок Bot API работает на своём event loop в отдельном потоке, чтобы не занижать
+точку насыщения: на loop'е обработчика остаются только фейковый Telethon и сам
+handle_new_message. GIL потоки всё же делят — мок держит его ненадолго.
+"""
+import argparse
+import asyncio
+import math
+import os
+import time
+from dataclasses import dataclass
+
+from tools.loadtest.bot_api import MockBotAPI
+from tools.loadtest.events import (
+    SCHEDULES, FakeChat, FakeTelethonClient, load_replay, make_text,
+)
+
+PREFIX = "loadtest_"
+SIGNATURE = "Подпишись на наш канал!"
+
+
+def percentile(values: list, p: float) -> float:
+    """Перцентиль методом ближайшего ранга; для пустого списка — nan."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+@dataclass
+class StepResult:
+    rate: float
+    emitted: int
+    delivered: int
+    flooded: int
+    lost: int
+    elapsed: float
+    latencies: list
+
+    @property
+    def throughput(self) -> float:
+        return (self.delivered + self.flooded) / self.elapsed if self.elapsed else 0.0
+
+    def saturated(self, slo_p95_ms: float) -> bool:
+        if self.emitted == 0:
+            return False
+        # Не успели обработать за drain, не держим темп или вышли за SLO по задержке
+        p95 = percentile(self.latencies, 95) * 1000
+        return self.lost > 0 or self.throughput < 0.9 * self.rate or p95 > slo_p95_ms
+
+
+def format_row(step: StepResult) -> str:
+    ms = [percentile(step.latencies, p) * 1000 for p in (50, 95, 99, 100)]
+    return (
+        f"{step.rate:>8.1f} {step.emitted:>8} {step.delivered:>9} {step.flooded:>6} {step.lost:>6} "
+        f"{step.throughput:>9.1f} " + " ".join(f"{v:>8.1f}" for v in ms)
+    )
+
+
+HEADER = (
+    f"{'rate/s':>8} {'emitted':>8} {'delivered':>9} {'429':>6} {'lost':>6} "
+    f"{'thru/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+)
+
+
+# ================================
+# Данные в БД
+
+async def seed(donor_names: list):
+    from sqlalchemy import select
+    from core.models import City, DonorChannel
+    from infra.db import AsyncSessionLocal, init_db
+
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(City).where(City.channel_id == f"{PREFIX}city"))
+        city = result.scalar_one_or_none()
+        if not city:
+            city = City(title="Loadtest", channel_id=f"{PREFIX}city", link=f"https://t.me/{PREFIX}city", auto_mode=True)
+            session.add(city)
+            await session.flush()
+        result = await session.execute(select(DonorChannel.channel_id).where(DonorChannel.city_id == city.id))
+        existing = set(result.scalars().all())
+        for name in donor_names:
+            if name not in existing:
+                session.add(DonorChannel(
+                    title=f"https://t.me/{name}", channel_id=name, city_id=city.id, mask_pattern=SIGNATURE
+                ))
+        await session.commit()
+
+
+async def cleanup():
+    from sqlalchemy import delete, select
+    from core.models import City, DonorChannel, Post
+    from infra.db import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(City.id).where(City.channel_id == f"{PREFIX}city"))
+        city_id = result.scalar_one_or_none()
+        if city_id is not None:
+            await session.execute(delete(Post).where(Post.city_id == city_id))
+            await session.execute(delete(DonorChannel).where(DonorChannel.city_id == city_id))
+            await session.execute(delete(City).where(City.id == city_id))
+            await session.commit()
+
+
+# ================================
+# Прогон
+
+async def run_step(client, mock, rate, offsets, make_event, drain_timeout) -> StepResult:
+    emitted = {}
+    latencies = []
+    delivered = flooded = 0
+
+    first_record = len(mock.records)
+    start = time.perf_counter()
+    await client.play(offsets, make_event, on_emit=lambda event: emitted.__setitem__(event.seq, event.emitted_at))
+    await client.drain(drain_timeout)
+    elapsed = time.perf_counter() - start
+
+    # Записи мока пишутся из его потока; perf_counter общий на процесс
+    for record in mock.records[first_record:]:
+        sent_at = emitted.get(record.seq)
+        if sent_at is None:
+            continue
+        if record.status == 429:
+            flooded += 1
+            continue
+        delivered += 1
+        latencies.append(record.done_at - sent_at)
+
+    return StepResult(
+        rate=rate,
+        emitted=len(emitted),
+        delivered=delivered,
+        flooded=flooded,
+        lost=len(emitted) - delivered - flooded,
+        elapsed=elapsed,
+        latencies=latencies,
+    )
+
+
+async def main(args):
+    mock = MockBotAPI(
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        flood_rate=args.flood_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    mock.start_in_thread()
+    # До импорта news_bot: бот должен ходить в мок, а не в api.telegram.org
+    os.environ["TELEGRAM_API_SERVER"] = mock.base_url
+
+    from bots.news_bot import bot as news_bot
+    from infra.telethon_client import start_telethon_watcher
+
+    replay = load_replay(args.replay) if args.replay else None
+    if replay:
+        donor_names = sorted({chat for _, chat, _ in replay})
+    else:
+        donor_names = [f"{PREFIX}donor_{i}" for i in range(args.donors)]
+    chats = {name: FakeChat(username=name, id=-(1000 + i)) for i, name in enumerate(donor_names)}
+
+    await seed(donor_names)
+    client = FakeTelethonClient(sequential_updates=args.sequential)
+    watcher = asyncio.create_task(start_telethon_watcher(client))
+    await client.ready.wait()
+
+    results = []
+    try:
+        print(HEADER)
+        if replay:
+            replay_iter = iter(replay)
+
+            def make_event(seq):
+                _, chat, text = next(replay_iter)
+                return chats[chat], make_text(seq, body=text)
+
+            rate = len(replay) / max(replay[-1][0], 1e-9)
+            step = await run_step(client, mock, rate, [item[0] for item in replay], make_event, args.drain)
+            results.append(step)
+            print(format_row(step))
+        else:
+            def make_event(seq):
+                chat = chats[donor_names[seq % len(donor_names)]]
+                return chat, make_text(seq, signature=SIGNATURE)
+
+            for rate in args.rates:
+                schedule = SCHEDULES[args.shape]
+                if args.shape == "burst":
+                    offsets = schedule(rate, args.duration, burst_size=args.burst_size)
+                elif args.shape == "poisson":
+                    offsets = schedule(rate, args.duration, seed=args.seed)
+                else:
+                    offsets = schedule(rate, args.duration)
+                step = await run_step(client, mock, rate, offsets, make_event, args.drain)
+                results.append(step)
+                print(format_row(step))
+    finally:
+        client.disconnect()
+        await watcher
+        await news_bot.session.close()
+        mock.stop_thread()
+        if not args.keep_data:
+            await cleanup()
+
+    saturated = next((step for step in results if step.saturated(args.slo_p95_ms)), None)
+    if saturated:
+        best = max((s.throughput for s in results if not s.saturated(args.slo_p95_ms)), default=0.0)
+        print(
+            f"\nНасыщение на {saturated.rate:.1f} сообщ./с "
+            f"(устойчиво: {best:.1f} сообщ./с при p95 <= {args.slo_p95_ms:.0f} мс)"
+        )
+    else:
+        print(f"\nНасыщение не достигнуто (макс. {max(s.throughput for s in results):.1f} сообщ./с)")
+    if client.errors:
+        print(f"Ошибок в обработчике: {client.errors}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный тест пути донор -> канал города")
+    parser.add_argument("--rates", type=lambda s: [float(x) for x in s.split(",")], default=[5, 10, 20, 50, 100],
+                        help="ступени нагрузки, сообщений в секунду (через запятую)")
+    parser.add_argument("--duration", type=float, default=10.0, help="длительность ступени, с")
+    parser.add_argument("--shape", choices=sorted(SCHEDULES), default="constant")
+    parser.add_argument("--burst-size", type=int, default=20)
+    parser.add_argument("--replay", help="JSONL с записанными сообщениями вместо генератора")
+    parser.add_argument("--donors", type=int, default=10)
+    parser.add_argument("--sequential", action="store_true", help="обрабатывать события последовательно")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--slo-p95-ms", type=float, default=1000.0)
+    parser.add_argument("--drain", type=float, default=30.0, help="сколько ждать хвост после ступени, с")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--keep-data", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,187 @@
+"""
+Сэмплирующий профайлер event loop'а, включаемый на N секунд в работающем процессе.
+
+Пока профайлер выключен, ничего не установлено: ни потоков, ни хуков, ни debug-режима loop'а.
+Во время работы:
+- фоновый поток раз в interval снимает стек потока с loop'ом (sys._current_frames)
+  и копит их в collapsed-формате (flamegraph.pl / speedscope);
+- heartbeat-корутина отмечает каждый тик loop'а; если тика нет дольше slow_threshold,
+  поток считает это медленным колбэком и запоминает, какой стек его держал;
+- раз в task_interval считаются живые asyncio-задачи по имени корутины.
+Работает и с uvloop (не полагается на loop.set_debug).
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+_lock = asyncio.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    # Короткий путь: относительно проекта, иначе имя файла
+    if filename.startswith(os.getcwd()):
+        filename = os.path.relpath(filename)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def collapse(frame, skip=()) -> str:
+    """Стек от корня к листу через ';' — формат collapsed stacks."""
+    labels = []
+    while frame is not None:
+        if frame.f_code.co_filename not in skip:
+            labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+@dataclass
+class ProfileReport:
+    duration: float
+    samples: int
+    stacks: Counter
+    stall_durations: list
+    stall_stacks: Counter
+    task_counts: dict = field(default_factory=dict)
+
+    def collapsed(self) -> bytes:
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        return ("\n".join(lines) + "\n").encode()
+
+    def summary(self, top: int = 5) -> str:
+        lines = [f"Длительность: {self.duration:.1f} с, сэмплов: {self.samples}"]
+        if self.stall_durations:
+            total = sum(self.stall_durations)
+            lines.append(
+                f"Медленные колбэки: {len(self.stall_durations)}, "
+                f"макс. {max(self.stall_durations) * 1000:.0f} мс, всего {total * 1000:.0f} мс"
+            )
+            for stack, count in self.stall_stacks.most_common(top):
+                leaf = stack.rsplit(";", 1)[-1]
+                lines.append(f"  {count} × {leaf}")
+        else:
+            lines.append("Медленных колбэков нет")
+        if self.task_counts:
+            lines.append("Задачи asyncio (макс. / среднее):")
+            ordered = sorted(self.task_counts.items(), key=lambda item: -max(item[1]))
+            for name, counts in ordered[:top]:
+                lines.append(f"  {name}: {max(counts)} / {sum(counts) / len(counts):.1f}")
+        return "\n".join(lines)
+
+
+class LoopProfiler:
+    def __init__(self, interval: float = 0.005, slow_threshold: float = 0.1, task_interval: float = 0.5):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.task_interval = task_interval
+        self.stacks = Counter()
+        self.stall_stacks = Counter()
+        self.stall_durations = []
+        self.task_counts = {}
+        self.samples = 0
+        self._beat = 0.0
+        self._stop = threading.Event()
+        self._target_id = None
+
+    # ================================
+    # Поток-сэмплер
+
+    def _sample_loop(self):
+        skip = {__file__}
+        stall_start = None
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target_id)
+            if frame is None:
+                continue
+            stack = collapse(frame, skip=skip)
+            del frame
+            self.stacks[stack] += 1
+            self.samples += 1
+
+            now = time.perf_counter()
+            beat = self._beat
+            if now - beat > self.slow_threshold:
+                if stall_start is None:
+                    stall_start = beat
+                self.stall_stacks[stack] += 1
+            elif stall_start is not None:
+                # Loop снова тикает — колбэк держал его с stall_start до текущего тика
+                self.stall_durations.append(beat - stall_start)
+                stall_start = None
+        if stall_start is not None:
+            self.stall_durations.append(time.perf_counter() - stall_start)
+
+    # ================================
+    # Сторона loop'а
+
+    def _count_tasks(self):
+        counts = Counter()
+        for task in asyncio.all_tasks():
+            coro = task.get_coro()
+            name = getattr(coro, "__qualname__", None) or type(coro).__name__
+            counts[name] += 1
+        for name, count in counts.items():
+            self.task_counts.setdefault(name, []).append(count)
+
+    async def _heartbeat(self, deadline: float):
+        next_tasks = 0.0
+        while True:
+            now = time.perf_counter()
+            self._beat = now
+            if now >= next_tasks:
+                self._count_tasks()
+                next_tasks = now + self.task_interval
+            if now >= deadline:
+                return
+            await asyncio.sleep(self.interval)
+
+    async def run(self, duration: float) -> ProfileReport:
+        self._target_id = threading.get_ident()
+        self._beat = time.perf_counter()
+        started = self._beat
+        thread = threading.Thread(target=self._sample_loop, name="loop-profiler", daemon=True)
+        thread.start()
+        try:
+            await self._heartbeat(started + duration)
+        finally:
+            self._stop.set()
+            # join в executor'е, чтобы не блокировать loop на последнем сэмпле
+            await asyncio.get_running_loop().run_in_executor(None, thread.join)
+        return ProfileReport(
+            duration=time.perf_counter() - started,
+            samples=self.samples,
+            stacks=self.stacks,
+            stall_durations=self.stall_durations,
+            stall_stacks=self.stall_stacks,
+            task_counts=self.task_counts,
+        )
+
+
+def is_running() -> bool:
+    return _lock.locked()
+
+
+async def profile_for(duration: float, **kwargs) -> ProfileReport:
+    """Один профайлер на процесс: второй вызов ждёт, пока закончится первый."""
+    async with _lock:
+        return await LoopProfiler(**kwargs).run(duration)
+
+
+async def try_profile_for(duration: float, on_start=None, **kwargs):
+    """
+    Как profile_for, но если профайлер уже занят — сразу None, без очереди.
+    Проверка и захват lock'а идут без await между ними; on_start вызывается уже под lock'ом.
+    """
+    if _lock.locked():
+        return None
+    async with _lock:
+        if on_start:
+            await on_start()
+        return await LoopProfiler(**kwargs).run(duration)